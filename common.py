@@ -4,10 +4,9 @@
 # pylint: disable=C0111,E1129,R0205,R0912,W0611,W1113
 
 # Standard library imports
-import collections
+import functools
 import os
 import platform
-import re
 import subprocess
 import sys
 import tempfile
@@ -18,51 +17,58 @@ import types
 import decorator
 
 
+###
+# Global variables
+###
+BUFFER_SIZE = 1 << 20
+
+
 ###
 # Functions
 ###
+@functools.lru_cache(maxsize=4096)
+def _exists(fname):
+    """Check whether a file exists, cached since ancestor directories are shared."""
+    return os.access(fname, os.F_OK)
+
+
 def _find_ref_fname(fname, ref_fname):
     """
     Find reference file.
 
     Start one directory above where current script is located
     """
+    return _find_ref_in_dir(os.path.dirname(os.path.abspath(fname)), ref_fname)
+
+
+@functools.lru_cache(maxsize=1024)
+def _find_ref_in_dir(start_dir, ref_fname):
+    """Find reference file in directory or its ancestors, cached per directory."""
     curr_dir = ""
-    next_dir = os.path.dirname(os.path.abspath(fname))
+    next_dir = start_dir
     while next_dir != curr_dir:
         curr_dir = next_dir
         rcfile = os.path.join(curr_dir, ref_fname)
-        if os.path.exists(rcfile):
+        if _exists(rcfile):
             return rcfile
         next_dir = os.path.dirname(curr_dir)
     return ""
 
 
-def _grep(fname, words):
-    """Return line numbers in which words appear in a file."""
-    # pylint: disable=W0631
-    pat = "(.*[^a-zA-Z]|^){}([^a-zA-Z].*|$)"
-    regexps = [(word, re.compile(pat.format(word))) for word in words]
-    ldict = collections.defaultdict(list)
-    for num, line in enumerate(_read_file(fname)):
-        for word in [word for word, regexp in regexps if regexp.match(line)]:
-            ldict[word].append(num + 1)
-    return ldict
-
-
 def _make_abspath(value):
     """Homogenize files to have absolute paths."""
     value = value.strip()
     if not os.path.isabs(value):
-        value = os.path.abspath(os.path.join(os.getcwd(), value))
+        value = os.path.abspath(value)
     return value
 
 
 def _read_file(fname):
     """Return file lines as strings."""
-    with open(fname) as fobj:
-        for line in fobj:
-            yield _tostr(line).strip()
+    with open(fname, "rb", buffering=BUFFER_SIZE) as fobj:
+        data = fobj.read()
+    for line in data.splitlines():
+        yield line.decode("utf-8", "replace").strip()
 
 
 def _shcmd(cmd, timeout=15):
@@ -103,13 +109,14 @@ class StreamFile(object):
 
     def __init__(self, lint_file):  # noqa
         self.lint_file = lint_file
+        self._fobj = None
 
     def __enter__(self):  # noqa
-        with open(self.lint_file, "r") as fobj:
-            for line in fobj:
-                yield line
+        self._fobj = open(self.lint_file, "r")
+        return self._fobj
 
     def __exit__(self, exc_type, exc_value, exc_tb):  # noqa
+        self._fobj.close()
         return not exc_type is not None
 
 
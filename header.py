@@ -5,6 +5,7 @@
 
 # Standard library imports
 import datetime
+import functools
 import os
 import re
 import sys
@@ -17,9 +18,44 @@ from pylint.checkers import BaseChecker
 from common import _find_ref_fname, _read_file, _tostr, StreamFile
 
 
+###
+# Global variables
+###
+SDIR = os.path.dirname(os.path.abspath(__file__))
+SHEBANG_LINE_REGEXP = re.compile(r"^#!.*[ \\/](bash|python)$")
+SL_MOD_DOCSTRING = re.compile("('''|\"\"\").*('''|\"\"\")")
+
+
 ###
 # Functions (common with hook)
 ###
+@functools.lru_cache(maxsize=128)
+def _compiled_header(header_ref, comment, basename, current_year):
+    """Return compiled header reference lines, cached across files."""
+    ctx = {
+        "comment": comment,
+        "fullname": basename,
+        "basename": basename,
+        "current_year": current_year,
+    }
+    return tuple(
+        re.compile(r"\A" + line.format_map(ctx) + r"\Z")
+        for line in _header_template(header_ref)
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _header_template(header_ref):
+    """Return header reference lines, file is read once per run."""
+    return tuple(_read_file(header_ref))
+
+
+@functools.lru_cache(maxsize=8)
+def _coding_regexp(comment):
+    """Return compiled file encoding line regular expression for a comment token."""
+    return re.compile(r"^{0} -\*- coding: utf-8 -\*-\s*".format(re.escape(comment)))
+
+
 def _check_header(fname, streamer, comment="#", header_ref=""):
     """Check that all files have header line and copyright notice."""
     # pylint: disable=W0702
@@ -30,18 +66,9 @@ def _check_header(fname, streamer, comment="#", header_ref=""):
             file=sys.stderr,
         )
         return []
-    fullname = os.path.basename(os.path.abspath(fname))
     basename = os.path.basename(os.path.abspath(fname))
     current_year = datetime.datetime.now().year
-    header_lines = []
-    for line in _read_file(header_ref):
-        line = line.format(
-            comment=comment,
-            fullname=fullname,
-            basename=basename,
-            current_year=current_year,
-        )
-        header_lines.append(re.compile("^" + line + "$"))
+    header_lines = _compiled_header(header_ref, comment, basename, current_year)
     linenos = []
     with streamer(fname) as stream:
         for (num, line), regexp in zip(_content_lines(stream, comment), header_lines):
@@ -52,26 +79,24 @@ def _check_header(fname, streamer, comment="#", header_ref=""):
 
 def _content_lines(stream, comment="#"):
     """Return non-empty lines of a package."""
-    shebang_line_regexp = re.compile(r"^#!.*[ \\/](bash|python)$")
-    sl_mod_docstring = re.compile("('''|\"\"\").*('''|\"\"\")")
     encoding_dribble = "\xef\xbb\xbf"
     shebang_line = False
     in_mod_docstring = False
     mod_string_done = False
-    cregexp = re.compile(r"^{0} -\*- coding: utf-8 -\*-\s*".format(comment))
+    cregexp = _coding_regexp(comment)
     for num, line in enumerate(stream):
         line = _tostr(line).rstrip()
         if (not num) and line.startswith(encoding_dribble):
             line = line[len(encoding_dribble) :]
         # Skip shebang line
-        if (not num) and shebang_line_regexp.match(line):
+        if (not num) and SHEBANG_LINE_REGEXP.match(line):
             shebang_line = True
             continue
         # Skip file encoding line
         if (num == int(shebang_line)) and cregexp.match(line):
             continue
         # Skip single-line module docstrings
-        if (not num) and sl_mod_docstring.match(line):
+        if (not num) and SL_MOD_DOCSTRING.match(line):
             continue
         if (not num) and (not mod_string_done) and line.startswith('"""'):
             in_mod_docstring = True
@@ -128,9 +153,8 @@ class HeaderChecker(BaseChecker):
         """Process a module. Content is accessible via node.stream() function."""
         # pylint: disable=E1101
         header_ref = self.config.header_ref.strip()
-        sdir = os.path.dirname(os.path.abspath(__file__))
         if header_ref:
-            header_ref = os.path.join(sdir, header_ref)
+            header_ref = os.path.join(SDIR, header_ref)
         fname = node.file
         linenos = _check_header(fname, StreamFile, header_ref=header_ref)
         for lineno in linenos:
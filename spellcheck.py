@@ -5,12 +5,20 @@
 # pylint: disable=R0205,R0903,R0912,R0914,R1718,W0611,W0702,W1113
 
 # Standard library imports
-from fnmatch import fnmatch
+import atexit
+import collections
+import fnmatch
+import itertools
 import os
 import platform
+import queue
 import re
 import shutil
+import string
+import subprocess
 import sys
+import tempfile
+import threading
 
 # PyPI imports
 try:
@@ -24,33 +32,130 @@ from pylint.checkers import BaseChecker
 
 # Intra-package imports
 from common import (
+    BUFFER_SIZE,
     _find_ref_fname,
-    _grep,
     _make_abspath,
     _read_file,
-    _shcmd,
     _tostr,
     StreamFile,
-    TmpFile,
 )
 
 
 ###
 # Global variables
 ###
+SDIR = os.path.dirname(os.path.abspath(__file__))
 REF_WHITELIST = os.path.join("data", "whitelist.en.pws")
 REF_EXCLUDE = os.path.join("data", "exclude-spelling")
+# Translation table that maps every byte except ASCII letters and line breaks to a
+# space, multi-byte UTF-8 sequences become delimiters as well
+NON_ALPHA = bytes(
+    char if chr(char) in string.ascii_letters + "\r\n" else ord(" ")
+    for char in range(256)
+)
+_EXCLUDES = {}
+_PIPES = {}
+_SPELLER = None
+_WHITELISTS = {}
 
 
 ###
 # Functions
 ###
+def _close_pipes():
+    """Terminate all persistent hunspell processes."""
+    for _, pipe in _PIPES.values():
+        pipe.close()
+
+
+atexit.register(_close_pipes)
+
+
+def _excluded(fname, exclude_fname):
+    """Check whether file matches any of the patterns in the exclude file."""
+    if not exclude_fname:
+        return False
+    exclude_fname = os.path.abspath(exclude_fname)
+    if not os.path.exists(exclude_fname):
+        print("WARNING: exclude file {0} not found".format(exclude_fname))
+        return False
+    regexp = _load_excludes(exclude_fname)
+    return bool(regexp and regexp.match(fname))
+
+
+def _get_pipe(cmd, signature):
+    """
+    Return persistent hunspell process for a given command, start it if needed.
+
+    hunspell reads the personal dictionary only at start up, the process is
+    restarted when the whitelist signature changes
+    """
+    key = tuple(cmd)
+    cached = _PIPES.get(key)
+    if (not cached) or (cached[0] != signature) or (not cached[1].alive()):
+        if cached:
+            cached[1].close()
+        cached = _PIPES[key] = (signature, HunspellPipe(cmd))
+    return cached[1]
+
+
+def _get_speller():
+    """Return native spell checker, dictionary is loaded once per process."""
+    # pylint: disable=W0603
+    global _SPELLER
+    if _SPELLER is None:
+        _SPELLER = hunspell.Hunspell("en_US")
+    return _SPELLER
+
+
+def _load_excludes(fname):
+    """
+    Return exclude patterns compiled into a single regular expression.
+
+    Relative patterns are resolved against the current working directory, the file
+    is only re-read if it has changed
+    """
+    signature = (_signature(fname), os.getcwd())
+    cached = _EXCLUDES.get(fname)
+    if (cached is None) or (cached[0] != signature):
+        patterns = [
+            fnmatch.translate(_make_abspath(item)) for item in _read_file(fname)
+        ]
+        regexp = re.compile("|".join(patterns)) if patterns else None
+        cached = _EXCLUDES[fname] = (signature, regexp)
+    return cached[1]
+
+
+def _load_whitelist(fname):
+    """Return whitelist words, file is only re-read if it has changed."""
+    signature = _signature(fname)
+    cached = _WHITELISTS.get(fname)
+    if (cached is None) or (cached[0] != signature):
+        cached = _WHITELISTS[fname] = (signature, frozenset(_read_file(fname)))
+    return cached[1]
+
+
+def _read_tokens(fname):
+    """Return words in each line of a file."""
+    with open(fname, "rb", buffering=BUFFER_SIZE) as fobj:
+        text = fobj.read().translate(NON_ALPHA).decode("ascii")
+    return [line.split() for line in text.splitlines()]
+
+
+def _signature(fname):
+    """Return file modification time and size, used to detect file changes."""
+    stat = os.stat(fname)
+    return stat.st_mtime_ns, stat.st_size
+
+
 def check_spelling(fname, whitelist_fname="", exclude_fname=""):
     """Check spelling against whitelist."""
     fname = os.path.abspath(fname)
-    whitelist_fname = whitelist_fname.strip() or _find_ref_fname(fname, REF_WHITELIST)
     exclude_fname = exclude_fname.strip() or _find_ref_fname(fname, REF_EXCLUDE)
-    obj = Hunspell(NATIVE, whitelist_fname, exclude_fname)
+    if _excluded(fname, exclude_fname):
+        return []
+    whitelist_fname = whitelist_fname.strip() or _find_ref_fname(fname, REF_WHITELIST)
+    obj = Hunspell(NATIVE, whitelist_fname)
     return obj.check(fname)
 
 
@@ -65,60 +170,162 @@ class Hunspell(object):
     the installed hunspell package.
     """
 
-    def __init__(self, native, whitelist_fname, exclude_fname):
+    def __init__(self, native, whitelist_fname):
         """Check that hunspell binary can be found."""
         if not shutil.which("hunspell"):
             print("hunspell binary not found, skipping")
         self.native = native
         self.cmd = ["hunspell"]
-        self.whitelist = []
+        self.whitelist = frozenset()
+        self.signature = None
         if whitelist_fname:
             whitelist_fname = os.path.abspath(whitelist_fname)
             if not os.path.exists(whitelist_fname):
                 print("WARNING: Whitelist file {0} not found".format(whitelist_fname))
             else:
                 self.cmd += ["-p", whitelist_fname]
-                with open(whitelist_fname, "r") as fobj:
-                    self.whitelist = [item.strip() for item in fobj]
-        self.cmd += ["-l"]
-        self.exclude_fname = None
-        if exclude_fname:
-            exclude_fname = os.path.abspath(exclude_fname)
-            if not os.path.exists(exclude_fname):
-                print("WARNING: exclude file {0} not found".format(exclude_fname))
-            self.exclude_fname = exclude_fname
+                self.signature = _signature(whitelist_fname)
+                self.whitelist = _load_whitelist(whitelist_fname)
+        self.cmd += ["-a"]
 
     def check(self, fname):
         """Check file."""
-        if os.path.exists(self.exclude_fname):
-            patterns = [_make_abspath(item) for item in _read_file(self.exclude_fname)]
-            if any(fnmatch(fname, pattern) for pattern in patterns):
-                return []
         ret = []
+        line_tokens = _read_tokens(fname)
+        # Spell check each unique word only once
+        tokens = set(itertools.chain.from_iterable(line_tokens))
         if not self.native:
             # hunspell has trouble with apostrophes and other delimiters out-of-the-box
-            words = []
-            with open(fname, "r") as fobj:
-                for line in fobj:
-                    for word in re.split("[^a-zA-Z]", line.strip()):
-                        words.append(word)
-            with TmpFile(lambda x: x.write(os.linesep.join(words))) as temp_fname:
-                stdout, _ = _shcmd(self.cmd + [temp_fname])
-            words = sorted(list(set([word.strip() for word in stdout if word.strip()])))
+            pipe = _get_pipe(self.cmd, self.signature)
+            words = sorted(pipe.misspelled(sorted(tokens)))
             if words:
-                ldict = _grep(fname, words)
-                for word, lines in [(word, ldict[word]) for word in words]:
-                    for lnum in lines:
+                # Tokens are delimited by non-letters, so a word appears in a line
+                # exactly when it is one of the line tokens
+                ldict = collections.defaultdict(list)
+                bad = set(words)
+                for num, line in enumerate(line_tokens):
+                    for word in bad.intersection(line):
+                        ldict[word].append(num + 1)
+                for word in words:
+                    for lnum in ldict[word]:
                         ret.append((lnum, (word,)))
         else:
-            spell_obj = hunspell.Hunspell("en_US")
-            ret = []
-            with open(fname, "r") as fobj:
-                for num, line in enumerate(fobj):
-                    line = line.strip()
-                    for word in re.split("[^a-zA-Z]", line):
-                        if (not spell_obj.spell(word)) and (word not in self.whitelist):
-                            ret.append((num + 1, (word,)))
+            spell_obj = _get_speller()
+            tokens -= self.whitelist
+            bad = set(word for word in tokens if not spell_obj.spell(word))
+            ret = [
+                (num + 1, (word,))
+                for num, line in enumerate(line_tokens)
+                for word in line
+                if word in bad
+            ]
+        return ret
+
+
+class HunspellPipe(object):
+    """
+    Persistent hunspell process in pipe (Ispell-compatible) mode.
+
+    Avoids re-loading the dictionary for every file checked
+    """
+
+    def __init__(self, cmd, timeout=15):  # noqa
+        self.cmd = cmd
+        self.timeout = timeout
+        # A file does not block hunspell if a lot is written to stderr
+        self._stderr = tempfile.TemporaryFile(mode="w+")
+        self._obj = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+            universal_newlines=True,
+            bufsize=1,
+        )
+        # Output is read in a separate thread so that reads can time out
+        self._lines = queue.Queue()
+        reader = threading.Thread(target=self._read_stdout)
+        reader.daemon = True
+        reader.start()
+        # Discard version banner
+        if (not self._readline()) or (not self.alive()):
+            self._fail()
+
+    def _fail(self):
+        """Stop hunspell process and report why it could not be used."""
+        if self.alive():
+            self._obj.kill()
+        self._obj.wait()
+        self._stderr.seek(0)
+        stderr = self._stderr.read()
+        self._stderr.close()
+        raise RuntimeError(
+            "Shell command could not be executed successfully"
+            + os.linesep
+            + "COMMAND: "
+            + " ".join(self.cmd)
+            + os.linesep
+            + "RETURN CODE: {0}".format(self._obj.returncode)
+            + os.linesep
+            + "STDERR:"
+            + os.linesep
+            + stderr
+        )
+
+    def _read_stdout(self):
+        """Queue hunspell output lines, an empty string signals end of output."""
+        for line in self._obj.stdout:
+            self._lines.put(line)
+        self._lines.put("")
+
+    def _readline(self):
+        """Return next hunspell output line, fail if none arrives in time."""
+        try:
+            return self._lines.get(timeout=self.timeout)
+        except queue.Empty:
+            return self._fail()
+
+    def alive(self):
+        """Return True if hunspell process is still running."""
+        return self._obj.poll() is None
+
+    def close(self):
+        """Terminate hunspell process, can be called more than once."""
+        if not self._obj.stdin.closed:
+            try:
+                self._obj.stdin.close()
+            except OSError:
+                # Pending input cannot be delivered to a process that has exited
+                pass
+        if self.alive():
+            try:
+                self._obj.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                self._obj.kill()
+                self._obj.wait()
+        self._stderr.close()
+
+    def misspelled(self, words):
+        """Return words not found in dictionary."""
+        ret = []
+        # All words are sent at once, output is drained by the reader thread so
+        # a large batch does not block hunspell. A leading caret prevents a word
+        # from being taken as a command
+        try:
+            self._obj.stdin.write("".join("^" + word + "\n" for word in words))
+            self._obj.stdin.flush()
+        except OSError:
+            self._fail()
+        for word in words:
+            # Results are terminated by an empty line
+            line = self._readline()
+            while line.strip():
+                if line[0] in "&#":
+                    ret.append(word)
+                line = self._readline()
+            if not line:
+                # End of output, hunspell exited
+                self._fail()
         return ret
 
 
@@ -156,13 +363,12 @@ class SpellChecker(BaseChecker):
     def process_module(self, node):
         """Process a module. Content is accessible via node.stream() function."""
         if shutil.which("hunspell"):
-            sdir = os.path.dirname(os.path.abspath(__file__))
             whitelist_fname = _tostr(self.config.whitelist)
             exclude_fname = _tostr(self.config.exclude)
             if whitelist_fname:
-                whitelist_fname = os.path.abspath(os.path.join(sdir, whitelist_fname))
+                whitelist_fname = os.path.abspath(os.path.join(SDIR, whitelist_fname))
             if exclude_fname:
-                exclude_fname = os.path.abspath(os.path.join(sdir, exclude_fname))
+                exclude_fname = os.path.abspath(os.path.join(SDIR, exclude_fname))
             for line, args in check_spelling(
                 node.file, whitelist_fname=whitelist_fname, exclude_fname=exclude_fname
             ):